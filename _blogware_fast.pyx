@@ -0,0 +1,70 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled versions of the per-file helpers in `blogware.py`.
+
+Build it in place with `cythonize -i _blogware_fast.pyx`. `blogware` picks it
+up automatically, and falls back to the pure Python versions otherwise.
+"""
+
+from cpython.unicode cimport Py_UNICODE_ISSPACE
+
+
+cpdef tuple split_path(object path_like):
+    """Splits a path into its directory, filename, basename and extension"""
+
+    # Typed `str` arguments reject subclasses such as `blogware.Path`, so
+    # take any object and cast `str`s (subclasses included) without copying
+    if not isinstance(path_like, str):
+        raise TypeError("expected str, got {}".format(type(path_like).__name__))
+
+    cdef str path = <str>path_like
+
+    cdef Py_ssize_t n = len(path)
+    cdef Py_ssize_t sep = n - 1
+    cdef Py_ssize_t head_end, dot, i
+
+    while sep >= 0 and path[sep] != '/':
+        sep -= 1
+
+    cdef str filename = path[sep + 1:]
+
+    # Strip trailing separators from the directory, unless it is all separators
+    head_end = sep
+    while head_end > 0 and path[head_end - 1] == '/':
+        head_end -= 1
+
+    cdef str dir = path[:head_end] if head_end > 0 else path[:sep + 1]
+
+    # Leading dots don't start an extension, as with `os.path.splitext`
+    dot = len(filename) - 1
+    while dot > 0 and filename[dot] != '.':
+        dot -= 1
+
+    if dot > 0:
+        for i in range(dot):
+            if filename[i] != '.':
+                return dir, filename, filename[:dot], filename[dot:]
+
+    return dir, filename, filename, ''
+
+
+cpdef object find_frontmatter(str content, str top, str bottom):
+    """Finds the frontmatter at the start of some content"""
+
+    cdef Py_ssize_t n = len(content)
+    cdef Py_ssize_t start = 0
+    cdef Py_ssize_t top_end, bottom_start
+
+    while start < n and Py_UNICODE_ISSPACE(content[start]):
+        start += 1
+
+    if not content.startswith(top, start):
+        return None
+
+    top_end = start + len(top)
+    bottom_start = content.find(bottom, top_end)
+
+    if bottom_start == -1:
+        raise ValueError("Unterminated frontmatter")
+
+    return content[top_end:bottom_start], content[bottom_start + len(bottom):]
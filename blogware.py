@@ -1,21 +1,187 @@
 from __future__ import annotations
-from typing import Callable
-from functools import lru_cache
-import tomli, os
+from typing import Callable, Mapping
+from functools import lru_cache, partial
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from types import MappingProxyType
+from codecs import getincrementaldecoder
+import os, sys
+
+# Prefer a native TOML parser when one is installed, falling back to tomli.
+try:
+    from rtoml import loads as toml_loads
+except ImportError:
+    try:
+        from pytomlpp import loads as toml_loads
+    except ImportError:
+        from tomli import loads as toml_loads
 
 
 LAYOUT_DIR = 'layouts'
-TEMPLATE_FN = str.format
+TEMPLATE_FN = str.format_map
 
 FRONTMATTER_TOP = '---'
 FRONTMATTER_BOTTOM = '---'
-FRONTMATTER_PARSER = tomli.loads
+FRONTMATTER_PARSER = toml_loads
 
-CONFIG_PARSER = tomli.loads
+CONFIG_PARSER = toml_loads
 CONFIG_NAME = 'config.toml'
 
 CACHE_SIZE = 128
 
+# File contents read ahead of time by `DirIndex.walk_all`, keyed by path
+PREFETCHED: dict[str, bytes] = {}
+
+# Layouts loaded by `load_layout`, keyed by path. Unlike `FILE_FN`, this is
+# never evicted, since layouts are reused by every page of a build.
+_LAYOUT_CACHE: dict[str, FrontMatterFile] = {}
+
+
+def read_bytes(path: str) -> bytes:
+    """Reads a whole file as bytes and closes it"""
+
+    with open(path, 'rb', buffering=0) as f:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        return f.read()
+
+
+def _try_read_bytes(path: str) -> bytes | None:
+    """Like `read_bytes`, but returns `None` if the file can't be read"""
+    try:
+        return read_bytes(path)
+    except OSError:
+        return None
+
+
+def clear_prefetched(paths=None) -> None:
+    """
+    Drops data read ahead by `DirIndex.walk_all`, either for the given
+    paths or for every file if no paths are given.
+    """
+
+    if paths is None:
+        PREFETCHED.clear()
+    else:
+        for path in paths:
+            PREFETCHED.pop(path, None)
+
+
+def _read_prefetched(path: str) -> bytes:
+    """Returns the prefetched bytes of a file, or reads them if there are none"""
+
+    data = PREFETCHED.pop(path, None)
+    return read_bytes(path) if data is None else data
+
+
+def decode_text(data: bytes) -> str:
+    """
+    Decodes UTF-8 text, translating `\\r\\n` and `\\r` line endings to `\\n`
+    like text mode `open` does.
+    """
+
+    text = data.decode('utf-8')
+
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+    return text
+
+
+def read_file(path: str) -> str:
+    """Reads a whole file as UTF-8 text and closes it"""
+    return decode_text(read_bytes(path))
+
+
+def split_path(path: str) -> tuple[str, str, str, str]:
+    """
+    Splits a path into its directory, filename, basename and extension in
+    one pass. Equivalent to `os.path.split` followed by `os.path.splitext`.
+
+    ```py
+    >>> split_path('posts/index.md')
+    ('posts', 'index.md', 'index', '.md')
+    ```
+    """
+
+    if os.altsep:
+        # Drive letters and alternate separators need the full treatment
+        dir, filename = os.path.split(path)
+        return (dir, filename, *os.path.splitext(filename))
+
+    head, sep, filename = path.rpartition('/')
+    dir = head.rstrip('/') or head + sep
+
+    # Leading dots don't start an extension, as with `os.path.splitext`
+    dot = filename.rfind('.')
+    if dot > 0 and filename[:dot].strip('.'):
+        return dir, filename, filename[:dot], filename[dot:]
+
+    return dir, filename, filename, ''
+
+
+def find_frontmatter(content: str, top: str, bottom: str) -> tuple[str, str] | None:
+    """
+    Finds the frontmatter at the start of `content`, delimited by `top` and
+    `bottom`, and returns the unparsed frontmatter and the body. Returns
+    `None` if the content doesn't start with frontmatter.
+
+    ```py
+    >>> find_frontmatter('---\\ntitle = "Hi"\\n---\\nBody', '---', '---')
+    ('\\ntitle = "Hi"\\n', '\\nBody')
+    ```
+    """
+
+    # Skip leading whitespace without copying the content
+    start = 0
+    while start < len(content) and content[start].isspace():
+        start += 1
+
+    if not content.startswith(top, start):
+        return None
+
+    top_end = start + len(top)
+    bottom_start = content.find(bottom, top_end)
+
+    if bottom_start == -1:
+        raise ValueError("Unterminated frontmatter")
+
+    return content[top_end:bottom_start], content[bottom_start + len(bottom):]
+
+
+def parse_frontmatter(content: str, path: str) -> tuple[dict, str]:
+    """
+    Splits and parses the frontmatter of the content of the file at `path`,
+    and returns it along with the body.
+    """
+
+    try:
+        parts = find_frontmatter(content, FRONTMATTER_TOP, FRONTMATTER_BOTTOM)
+    except ValueError:
+        raise ValueError("Unterminated frontmatter in {}".format(path)) from None
+
+    if parts is None:
+        return {}, content
+
+    return FRONTMATTER_PARSER(parts[0]), parts[1]
+
+
+# Use the compiled versions of the hot helpers if they have been built.
+# Don't reach for Numba here: everything in this module works on strings,
+# dicts and `os.path`, which `@njit` either can't compile or runs in object
+# mode, which is slower than plain CPython. Use `_blogware_fast.pyx` instead.
+try:
+    import _blogware_fast
+except ImportError:
+    _blogware_fast = None
+
+if _blogware_fast is not None:
+    find_frontmatter = _blogware_fast.find_frontmatter
+
+    if not os.altsep:
+        split_path = _blogware_fast.split_path
+
 
 class Path(str):
     """Wraps a `str` and provides some utility methods for path manipulation."""
@@ -23,8 +189,7 @@ class Path(str):
     def __init__(self, *args) -> None:
         super().__init__()
 
-        self.dir, self.filename = os.path.split(self)
-        self.basename, self.ext = os.path.splitext(self.filename)
+        self.dir, self.filename, self.basename, self.ext = split_path(self)
     
     def swap_root(self, old_root: str, new_root: str):
         """
@@ -53,26 +218,70 @@ class Path(str):
 class File:
     """Represents a buildable file"""
 
+    __slots__ = ('path', 'dir', 'filename', 'basename', 'ext', 'args', 'kwargs', '_bytes', '_peek', '_content')
+
     def __init__(self, path: str, *args, **kwargs) -> None:
         self.path = Path(path)
 
-        self.dir, self.filename = os.path.split(self.path)
-        self.basename, self.ext = os.path.splitext(self.filename)
+        # `Path` has already split the path, so reuse its parts
+        self.dir = self.path.dir
+        self.filename = self.path.filename
+        self.basename = self.path.basename
+        self.ext = sys.intern(self.path.ext)
 
         self.args = args
         self.kwargs = kwargs
         
+        self._bytes = None
+        self._peek = None
         self._content = None
 
     def template(self, vars: dict) -> str:
         """Templates the content of the file"""
-        return TEMPLATE_FN(self.content, **vars)
+        return TEMPLATE_FN(self.content, vars)
+
+    def peek(self, n: int = 8) -> bytes:
+        """Returns the first `n` bytes of the file, without reading the rest"""
+        if self._bytes is None and self.path in PREFETCHED:
+            self._bytes = PREFETCHED.pop(self.path)
+
+        if self._bytes is not None:
+            return self._bytes[:n]
+
+        if self._peek is None or len(self._peek) < n:
+            with open(self.path, 'rb') as f:
+                data = f.read(n)
+
+            # The file ended within the peek, so this is all of it
+            if len(data) < n:
+                self._bytes = data
+                return data
+
+            self._peek = data
+
+        return self._peek[:n]
+
+    def write_bytes(self, path: str) -> None:
+        """Writes the content of the file to `path`, without decoding it"""
+        with open(path, 'wb') as f:
+            f.write(self.content_bytes)
+
+    @property
+    def content_bytes(self) -> bytes:
+        """The raw content of the file"""
+        if self._bytes is None:
+            self._bytes = _read_prefetched(self.path)
+
+        return self._bytes
 
     @property
     def content(self) -> str:
-        """The content of the file"""
+        """The content of the file, decoded as UTF-8 with universal newlines"""
         if self._content is None:
-            self._content = open(self.path).read()
+            self._content = decode_text(self.content_bytes)
+
+            # Don't keep both copies alive, `content_bytes` reads again if needed
+            self._bytes = None
 
         return self._content
 
@@ -80,6 +289,8 @@ class File:
 class FrontMatterFile(File):
     """Represents a file that might have frontmatter at the start"""
 
+    __slots__ = ('_body', '_frontmatter')
+
     def __init__(self, path: str, *args, **kwargs) -> None:
         super().__init__(path)
 
@@ -89,30 +300,55 @@ class FrontMatterFile(File):
         self._body = None
         self._frontmatter = None
 
+    def has_frontmatter(self) -> bool:
+        """
+        Returns False if the file certainly has no frontmatter. Only the
+        start of the file is read to decide this.
+        """
+
+        n = 64
+        data = self.peek(n)
+
+        # A multi-byte character may be cut off at the end of the peek
+        try:
+            head = getincrementaldecoder('utf-8')().decode(data)
+        except UnicodeDecodeError:
+            return False
+
+        stripped = head.lstrip()
+
+        if len(data) < n:
+            # Short files are peeked whole, so the start is all there is
+            return stripped.startswith(FRONTMATTER_TOP)
+
+        # The whitespace may go on past the peek
+        return (stripped.startswith(FRONTMATTER_TOP)
+            or FRONTMATTER_TOP.startswith(stripped))
+
     def split_frontmatter(self):
         """Splits the frontmatter and the body and returns them"""
 
-        if self.content.lstrip().startswith(FRONTMATTER_TOP):
-            self._frontmatter, self._body = (
-                self.content
-                    .replace(FRONTMATTER_TOP, '', 1)
-                    .split(FRONTMATTER_BOTTOM, 1)
-            )
+        if not self.has_frontmatter():
+            return {}, self.content
 
-            return FRONTMATTER_PARSER(self._frontmatter), self._body
+        return self._parse_frontmatter()
 
-        return {}, self._content
+    def _parse_frontmatter(self):
+        return parse_frontmatter(self.content, self.path)
     
     def template(self, vars: dict) -> str:
         """Templates the body using variables in the frontmatter"""
-        return TEMPLATE_FN(self.body, **{**vars, **self.frontmatter})
+        return TEMPLATE_FN(self.body, ChainMap(self.frontmatter, vars))
 
     @property
     def frontmatter(self) -> dict:
         """The frontmatter of the file"""
 
         if self._frontmatter == None:
-            self._frontmatter, self._body = self.split_frontmatter()
+            if self.has_frontmatter():
+                self._frontmatter, self._body = self._parse_frontmatter()
+            else:
+                self._frontmatter = {}
 
         return self._frontmatter # type: ignore
 
@@ -121,7 +357,11 @@ class FrontMatterFile(File):
         """The body of the file, which is the part after the frontmatter"""
 
         if self._body == None:
-            self._frontmatter, self._body = self.split_frontmatter()
+            # Either sets the body, or finds that there is no frontmatter
+            self.frontmatter
+
+        if self._body == None:
+            self._body = self.content
 
         return self._body
 
@@ -129,6 +369,8 @@ class FrontMatterFile(File):
 class DirIndex:
     """A lazy iterator over the contents of a directory"""
 
+    __slots__ = ('path', 'args', 'kwargs')
+
     def __init__(self, path: str, *args, **kwargs) -> None:
         self.path = Path(path)
         self.args = args
@@ -149,15 +391,132 @@ class DirIndex:
             elif entry.is_dir():
                 yield DIR_FN(entry.path, *self.args, **self.kwargs)
 
+    def walk_all(self) -> list[str]:
+        """
+        Reads every file under the directory concurrently, so that later
+        accesses to `File.content` don't have to wait on disk. Files that
+        can't be read, such as dangling symlinks, are skipped.
+
+        Returns the paths of all the files that were read. Data that is
+        never used by a `File` stays in memory until it is dropped with
+        `clear_prefetched`.
+        """
+
+        paths = [
+            os.path.join(dir, name)
+            # `items` follows symlinked directories, so this must too
+            for dir, _, names in os.walk(self.path, followlinks=True)
+            for name in names
+        ]
+
+        read = []
+
+        with ThreadPoolExecutor() as executor:
+            for path, data in zip(paths, executor.map(_try_read_bytes, paths)):
+                if data is not None:
+                    PREFETCHED[path] = data
+                    read.append(path)
+
+        return read
+
     def __iter__(self):
         return self.items()
 
 FILE_FN = lru_cache()(FrontMatterFile)
 DIR_FN = lru_cache()(DirIndex)
 
+class FileTable:
+    """
+    A flat table of every file under a directory, stored as parallel lists
+    (one list per field) rather than as one object per file.
+
+    ```py
+    >>> table = FileTable.from_dir('content')
+    >>> [table.paths[i] for i in table.with_ext('.md')]
+    ['content/index.md']
+    ```
+    """
+
+    __slots__ = ('paths', 'exts', 'basenames', 'dirs', 'contents', 'frontmatters', 'bodies')
+
+    def __init__(self, paths: list[str]) -> None:
+        self.paths = paths
+        self.dirs = []
+        self.basenames = []
+        self.exts = []
+
+        for path in paths:
+            dir, _, basename, ext = split_path(path)
+            self.dirs.append(dir)
+            self.basenames.append(basename)
+            self.exts.append(sys.intern(ext))
+
+        self.contents: list[str | None] = [None] * len(paths)
+        self.frontmatters: list[dict | None] = [None] * len(paths)
+        self.bodies: list[str | None] = [None] * len(paths)
+
+    @staticmethod
+    def from_dir(dir: str) -> FileTable:
+        """Constructs a `FileTable` from all the files under a directory"""
+
+        return FileTable([
+            os.path.join(parent, name)
+            for parent, _, names in os.walk(dir, followlinks=True)
+            for name in names
+        ])
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def with_ext(self, *args) -> list[int]:
+        """Returns the indices of the files that have one of the extensions"""
+        exts = frozenset(sys.intern(arg) for arg in args)
+        return [i for i, ext in enumerate(self.exts) if ext in exts]
+
+    def content(self, i: int) -> str:
+        """The content of the `i`th file"""
+
+        if self.contents[i] is None:
+            self.contents[i] = decode_text(_read_prefetched(self.paths[i]))
+
+        return self.contents[i] # type: ignore
+
+    def frontmatter(self, i: int) -> dict:
+        """The frontmatter of the `i`th file"""
+
+        if self.frontmatters[i] is None:
+            self.frontmatters[i], self.bodies[i] = parse_frontmatter(self.content(i), self.paths[i])
+
+        return self.frontmatters[i] # type: ignore
+
+    def body(self, i: int) -> str:
+        """The body of the `i`th file, which is the part after the frontmatter"""
+
+        if self.bodies[i] is None:
+            self.frontmatters[i], self.bodies[i] = parse_frontmatter(self.content(i), self.paths[i])
+
+        return self.bodies[i] # type: ignore
+
+    def file(self, i: int) -> FrontMatterFile:
+        """The `i`th file as a `FrontMatterFile`, for use with other helpers"""
+
+        file = FILE_FN(self.paths[i])
+
+        # Hand over anything the table has already read, so it isn't read twice
+        if file._content is None:
+            file._content = self.contents[i]
+
+        if file._frontmatter is None and self.frontmatters[i] is not None:
+            file._frontmatter, file._body = self.frontmatters[i], self.bodies[i]
+
+        return file
+
+
 class Iter:
     """Provides utility functions for working with a `DirIndex`"""
 
+    __slots__ = ('index', 'items')
+
     def __init__(self, index: DirIndex) -> None:
         self.index = index
         self.items = index.items()
@@ -190,33 +549,98 @@ class Iter:
         self.items = items
         return self
 
+    def match_exec_parallel(
+        self, predicate: Callable, fn: Callable, *args,
+        workers: int | None = None, **kwargs
+    ) -> Iter:
+        """
+        Like `match_exec`, but calls the function on the matching entries in
+        a pool of `workers` processes. The function, its arguments and the
+        entries must be picklable.
+        """
+
+        if workers == 1:
+            return self.match_exec(predicate, fn, *args, **kwargs)
+
+        self.items = list(self.items)
+        matches = [item for item in self.items if predicate(item)]
+
+        # Don't start a pool for directories with nothing to do
+        if not matches:
+            return self
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Consume the results so that errors in the workers are raised here
+            for _ in executor.map(partial(_call, fn, args, kwargs), matches, chunksize=16):
+                pass
+
+        return self
+
     def set_var(self, name: str, value) -> Iter:
         # Useless as of now
         self.index.kwargs[name] = value
         return self
 
 
-def get_config(dir, root) -> dict:
+def _call(fn: Callable, args: tuple, kwargs: dict, item):
+    """Calls `fn(item, *args, **kwargs)`, used to send calls to worker processes"""
+    return fn(item, *args, **kwargs)
+
+
+def get_config(dir, root) -> ChainMap:
     """
-    Returns the config of a directory, as a dict.
+    Returns the config of a directory, as a `ChainMap` over the config
+    files from the directory up to the root. Keys set on the result only
+    affect that result, but nested tables are shared between calls and
+    must be treated as read-only.
 
     Config is calculated in this manner:
     ```
     config_of_this_dir = config_of_parent_dir + config_from_config_file
     ```
     """
-    config_path = os.path.join(dir, CONFIG_NAME)
+    config = _get_config_cached(os.path.abspath(dir), os.path.realpath(root))
+    return config.new_child()
 
-    if os.path.exists(config_path):
-        config = CONFIG_PARSER(open(config_path).read())
-    else:
-        config = {}
 
-    if os.path.samefile(dir, root):
-        return config
-    else:
+@lru_cache(maxsize=None)
+def _get_config_cached(dir, real_root) -> ChainMap:
+    """
+    Computes the config of a directory. `dir` must be an absolute path and
+    `real_root` a real path.
+    """
+
+    # Collect the directories from `dir` up to `root`. The walk is lexical,
+    # so symlinked directories still inherit from the parents they appear
+    # under, and resolved paths are only used to recognise the root.
+    dirs = [dir]
+    while _realpath(dir) != real_root:
         parent_dir = os.path.split(dir)[0]
-        return {**get_config(parent_dir, root), **config}
+        if parent_dir == dir:
+            break
+
+        dir = parent_dir
+        dirs.append(dir)
+
+    return ChainMap(*map(_load_config, dirs))
+
+
+@lru_cache(maxsize=None)
+def _realpath(path) -> str:
+    return os.path.realpath(path)
+
+
+@lru_cache(maxsize=None)
+def _load_config(dir) -> Mapping:
+    """Parses the config file of a single directory, if it has one"""
+
+    try:
+        config = CONFIG_PARSER(read_file(os.path.join(dir, CONFIG_NAME)))
+    except FileNotFoundError:
+        config = {}
+
+    # Read-only, since the same config is shared by every call
+    return MappingProxyType(config)
 
 
 def load_layout(name) -> FrontMatterFile:
@@ -226,8 +650,12 @@ def load_layout(name) -> FrontMatterFile:
 
     path = os.path.join(LAYOUT_DIR, name)
 
+    if path in _LAYOUT_CACHE:
+        return _LAYOUT_CACHE[path]
+
     if os.path.isfile(path):
-        return FILE_FN(path)
+        _LAYOUT_CACHE[path] = layout = FrontMatterFile(path)
+        return layout
 
     raise Exception("Layout {} does not exist".format(name))
 
@@ -246,6 +674,10 @@ def ext(*args):
     ```
     """
 
+    # The frozenset is built once per predicate, so each call is a single
+    # hash lookup.
+    args = frozenset(sys.intern(arg) for arg in args)
+
     def inner(file) -> bool:
         return isinstance(file, File) and file.ext in args
     